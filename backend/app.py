@@ -2,25 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import gzip
-import json
+import functools
 import logging
 import os
 import random
 import re
+import threading
 import time
+from bisect import bisect_right
+from collections import deque
 from pathlib import Path
 from typing import Any, Dict, Iterable, List
 from urllib.parse import quote_plus
 
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .blacklist import DEFAULT_BLACKLIST
-from .models import CodeEntry, CodesResponse
 
 
 logger = logging.getLogger("sora2_scanner")
@@ -37,11 +39,49 @@ THREAD_URLS = os.getenv(
 ).split(",")
 TWITTER_SEARCH_URLS = os.getenv("TWITTER_SEARCH_URLS", "").split(",") if os.getenv("TWITTER_SEARCH_URLS") else []
 FETCH_INTERVAL_SECONDS = float(os.getenv("FETCH_INTERVAL_SECONDS", "5"))
+SCAN_CONCURRENCY = int(os.getenv("SCAN_CONCURRENCY", "4"))
 SCRAPE_DO_TOKEN = os.getenv("SCRAPE_DO_TOKEN")
 MAX_CODES = int(os.getenv("MAX_CODES", "200"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "15"))
+SCAN_QUEUE_LIMIT = int(os.getenv("SCAN_QUEUE_LIMIT", "2"))
+
+# google-re2 é um DFA de verdade (sem backtracking) e varre payloads grandes
+# muito mais rápido que o re da stdlib; é opcional porque exige lib nativa
+try:
+    import re2 as _regex_engine
+except ImportError:
+    _regex_engine = re
+
+# No engine da stdlib, os lookaheads já exigem >=2 letras e >=2 dígitos,
+# então a maioria dos falsos candidatos (PLEASE, 123456...) nem sai do
+# findall; re2 não suporta lookahead, então mantém o padrão simples e o
+# filtro fica por conta de is_valid_candidate
+if _regex_engine is re:
+    CODE_PATTERN = re.compile(
+        r"\b(?=[0-9A-Za-z]{6}\b)"
+        r"(?=(?:[A-Za-z]*[0-9]){2})"
+        r"(?=(?:[0-9]*[A-Za-z]){2})"
+        r"[0-9A-Za-z]{6}\b"
+    )
+else:
+    CODE_PATTERN = _regex_engine.compile(r"\b[0-9A-Za-z]{6}\b")
+
+# Variante em bytes para varrer HTML cru (path do Twitter) sem decodificar
+# a página inteira para str
+CODE_PATTERN_B = re.compile(
+    rb"\b(?=[0-9A-Za-z]{6}\b)"
+    rb"(?=(?:[A-Za-z]*[0-9]){2})"
+    rb"(?=(?:[0-9]*[A-Za-z]){2})"
+    rb"[0-9A-Za-z]{6}\b"
+)
+# Candidatos têm exatamente 6 chars (regex), então só entradas de 6 chars
+# da blacklist podem casar; o frozenset menor melhora a localidade do probe
+BLACKLIST_6 = frozenset(
+    word for word in (entry.upper() for entry in DEFAULT_BLACKLIST) if len(word) == 6
+)
 
-CODE_PATTERN = re.compile(r"\b[0-9A-Za-z]{6}\b")
-BLACKLIST = {word.upper() for word in DEFAULT_BLACKLIST}
+# Marca dígitos com "1" para contá-los numa única passada em C
+_DIGIT_MASK = str.maketrans("0123456789", "1111111111")
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -50,7 +90,18 @@ USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
 ]
 
-app = FastAPI(title="Sora2 Invite Code Scanner", version="1.0.0")
+BASE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+    "DNT": "1",
+    "Connection": "keep-alive",
+}
+
+app = FastAPI(
+    title="Sora2 Invite Code Scanner",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -64,12 +115,70 @@ if STATIC_DIR.exists():
     app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 _results_lock = asyncio.Lock()
-_codes: Dict[str, CodeEntry] = {}
-_ordered_codes: List[CodeEntry] = []
+_scan_semaphore = asyncio.Semaphore(SCAN_CONCURRENCY)
+# Limitador de backlog do /api/scan: um scan por vez, fila curta, excesso 503
+_manual_scan_gate = asyncio.Semaphore(1)
+_manual_scans_pending = 0
+# Dedupe barato: só o código em si, sem objeto pesado atrás
+_code_seen: set[str] = set()
+
+# Bloom filter de 64 KB na frente do set: três leituras de bit respondem
+# "definitivamente novo" sem tocar na tabela hash; só positivos (possíveis
+# falsos) caem no probe autoritativo do set
+_BLOOM_BITS = 1 << 19
+_bloom = bytearray(_BLOOM_BITS // 8)
+
+
+def _bloom_positions(code: str) -> tuple[int, int, int]:
+    h = hash(code)
+    mask = _BLOOM_BITS - 1
+    return h & mask, (h >> 19) & mask, (h >> 38) & mask
+
+
+def _bloom_maybe_contains(code: str) -> bool:
+    for pos in _bloom_positions(code):
+        if not _bloom[pos >> 3] & (1 << (pos & 7)):
+            return False
+    return True
+
+
+def _bloom_add(code: str) -> None:
+    for pos in _bloom_positions(code):
+        _bloom[pos >> 3] |= 1 << (pos & 7)
+
+
+# Entradas cruas (dicts leves), mais recentes primeiro; a serialização
+# da resposta consome os dicts diretamente
+_ordered_codes: deque[Dict[str, Any]] = deque()
+# Snapshot imutável para leitores: trocado atomicamente ao fim de cada scan,
+# então GET /api/codes não precisa disputar o lock do scanner
+_codes_snapshot: tuple[Dict[str, Any], ...] = ()
 _last_fetch: float = 0.0
 _scanner_task: asyncio.Task | None = None
 
-
+# Corpos de comentários já processados (hash + FIFO para expirar os antigos);
+# _process_payload roda em worker threads concorrentes, então o check-then-add
+# precisa de lock
+_SEEN_BODIES_MAX = 50_000
+_seen_body_hashes: set[int] = set()
+_seen_body_fifo: deque[int] = deque()
+_seen_bodies_lock = threading.Lock()
+
+
+def _body_already_seen(body: str) -> bool:
+    """Registra o corpo e devolve True se já foi processado num scan anterior"""
+    body_hash = hash(body)
+    with _seen_bodies_lock:
+        if body_hash in _seen_body_hashes:
+            return True
+        _seen_body_hashes.add(body_hash)
+        _seen_body_fifo.append(body_hash)
+        if len(_seen_body_fifo) > _SEEN_BODIES_MAX:
+            _seen_body_hashes.discard(_seen_body_fifo.popleft())
+    return False
+
+
+@functools.lru_cache(maxsize=16)
 def ensure_json_url(url: str) -> str:
     """Garante que a URL termina com .json"""
     url = url.strip()
@@ -86,29 +195,94 @@ def normalize_reddit_url(url: str) -> str:
     return ensure_json_url(url)
 
 
+@functools.lru_cache(maxsize=65536)
 def is_valid_candidate(candidate: str) -> bool:
-    candidate = candidate.upper()
-    if candidate in BLACKLIST:
+    """Valida um candidato já normalizado para maiúsculas
+
+    Memoizado: os mesmos códigos aparecem citados em dezenas de
+    comentários e voltam a cada scan; a validação é pura.
+    """
+    if candidate in BLACKLIST_6:
         return False
-    letters = sum(ch.isalpha() for ch in candidate)
-    digits = sum(ch.isdigit() for ch in candidate)
+    digits = candidate.translate(_DIGIT_MASK).count("1")
+    letters = len(candidate) - digits
     if letters < 2 or digits < 2:
         return False
     return True
 
 
-async def fetch_thread_json(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
-    """Busca JSON do Reddit com múltiplos fallbacks"""
-    url = normalize_reddit_url(url)
-    
+class _NotModified(Exception):
+    """Payload não mudou desde o último fetch (304 ou corpo idêntico)"""
+
+
+# Cache por URL: url -> (fetched_at, etag, last_modified, body_hash, payload)
+_url_cache: Dict[str, tuple[float, str | None, str | None, int | None, Dict[str, Any]]] = {}
+
+# Circuit-breaker por proxy: nome -> (falhas consecutivas, cooldown até)
+_proxy_failures: Dict[str, tuple[int, float]] = {}
+
+# Token bucket por proxy com taxa adaptativa (estilo AIMD: corta pela metade
+# em 429/5xx, recupera aditivamente em sucesso)
+PROXY_TOKENS_PER_SECOND = float(os.getenv("PROXY_TOKENS_PER_SECOND", "0.5"))
+PROXY_BUCKET_BURST = float(os.getenv("PROXY_BUCKET_BURST", "3"))
+
+_proxy_buckets: Dict[str, Dict[str, float]] = {}
+
+
+def _take_proxy_token(proxy_name: str, now: float) -> bool:
+    """Consome um token do bucket do proxy; False se a cota está esgotada"""
+    bucket = _proxy_buckets.setdefault(
+        proxy_name,
+        {"tokens": PROXY_BUCKET_BURST, "last": now, "rate": PROXY_TOKENS_PER_SECOND},
+    )
+    elapsed = max(0.0, now - bucket["last"])
+    bucket["tokens"] = min(PROXY_BUCKET_BURST, bucket["tokens"] + elapsed * bucket["rate"])
+    bucket["last"] = now
+    if bucket["tokens"] < 1.0:
+        return False
+    bucket["tokens"] -= 1.0
+    return True
+
+
+def _throttle_proxy(proxy_name: str) -> None:
+    """429/5xx: reduz a taxa pela metade (decréscimo multiplicativo)"""
+    bucket = _proxy_buckets.get(proxy_name)
+    if bucket is not None:
+        bucket["rate"] = max(PROXY_TOKENS_PER_SECOND / 8, bucket["rate"] / 2)
+
+
+def _recover_proxy(proxy_name: str) -> None:
+    """Sucesso: recupera a taxa aos poucos (acréscimo aditivo)"""
+    bucket = _proxy_buckets.get(proxy_name)
+    if bucket is not None:
+        bucket["rate"] = min(PROXY_TOKENS_PER_SECOND, bucket["rate"] + PROXY_TOKENS_PER_SECOND / 10)
+
+
+def _proxy_available(proxy_name: str, now: float) -> bool:
+    _, cooldown_until = _proxy_failures.get(proxy_name, (0, 0.0))
+    return now >= cooldown_until
+
+
+def _register_proxy_failure(proxy_name: str) -> None:
+    fails, _ = _proxy_failures.get(proxy_name, (0, 0.0))
+    fails += 1
+    cooldown = min(60.0, 5.0 * (2 ** (fails - 1)))
+    _proxy_failures[proxy_name] = (fails, time.time() + cooldown)
+
+
+def _register_proxy_success(proxy_name: str) -> None:
+    _proxy_failures.pop(proxy_name, None)
+
+
+def _build_proxy_methods(url: str) -> List[tuple[str, str]]:
     proxy_methods = []
-    
+
     # ScraperAPI primeiro (se disponível)
     if SCRAPE_DO_TOKEN:
         proxy_methods.append(
             ("ScraperAPI", f"http://api.scraperapi.com?api_key={SCRAPE_DO_TOKEN}&url={quote_plus(url)}")
         )
-    
+
     # Proxies CORS públicos
     proxy_methods.extend([
         ("AllOrigins", f"https://api.allorigins.win/raw?url={quote_plus(url)}"),
@@ -116,178 +290,362 @@ async def fetch_thread_json(client: httpx.AsyncClient, url: str) -> Dict[str, An
         ("CorsProxy", f"https://corsproxy.io/?{quote_plus(url)}"),
         ("ThingProxy", f"https://thingproxy.freeboard.io/fetch/{url}"),
     ])
-    
-    # Direto como último recurso
-    proxy_methods.append(("Direct", url))
-    
-    last_error = None
-    
-    for proxy_name, target_url in proxy_methods:
+
+    return proxy_methods
+
+
+async def _try_proxy(
+    client: httpx.AsyncClient,
+    proxy_name: str,
+    target_url: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    body_hash: int | None = None,
+) -> tuple[Dict[str, Any], str | None, str | None, int]:
+    """Tenta um único proxy; retorna (payload, etag, last_modified, body_hash)
+
+    Levanta _NotModified se o servidor responder 304 ou o corpo for
+    idêntico ao do fetch anterior.
+    """
+    headers = {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept": "application/json, text/html, */*",
+        "Accept-Language": "en-US,en;q=0.9",
+        "DNT": "1",
+        "Connection": "keep-alive",
+    }
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    logger.info(f"Tentando {proxy_name}...")
+
+    response = await client.get(
+        target_url,
+        headers=headers,
+        timeout=25,
+        follow_redirects=True
+    )
+    if response.status_code == 304:
+        logger.info(f"✓ {proxy_name}: 304, payload inalterado")
+        raise _NotModified(proxy_name)
+    response.raise_for_status()
+
+    # httpx já descomprime gzip/deflate/br conforme Content-Encoding
+    content = response.content
+
+    if not content or not content.strip():
+        raise ValueError(f"{proxy_name} retornou vazio")
+
+    # Proxies que removem ETag: detectar corpo idêntico pelo hash
+    new_body_hash = hash(content)
+    if body_hash is not None and new_body_hash == body_hash:
+        logger.info(f"✓ {proxy_name}: corpo idêntico, payload inalterado")
+        raise _NotModified(proxy_name)
+
+    # Parse em thread: payloads de megathread levam dezenas de ms e
+    # bloqueariam o event loop
+    payload = await asyncio.to_thread(orjson.loads, content)
+
+    new_etag = response.headers.get("etag")
+    new_last_modified = response.headers.get("last-modified")
+
+    # Validar estrutura
+    if isinstance(payload, list) and payload:
+        logger.info(f"✓ {proxy_name} funcionou!")
+        result = payload[1] if len(payload) > 1 else payload[0]
+        return result, new_etag, new_last_modified, new_body_hash
+    if isinstance(payload, dict):
+        logger.info(f"✓ {proxy_name} funcionou!")
+        return payload, new_etag, new_last_modified, new_body_hash
+    raise ValueError(f"{proxy_name} estrutura inesperada")
+
+
+async def fetch_thread_json(client: httpx.AsyncClient, url: str) -> Dict[str, Any]:
+    """Busca JSON do Reddit correndo proxies em paralelo, com fallbacks"""
+    url = normalize_reddit_url(url)
+    now = time.time()
+
+    cached = _url_cache.get(url)
+    if cached is not None:
+        fetched_at, etag, last_modified, body_hash, payload = cached
+        if now - fetched_at < CACHE_TTL_SECONDS:
+            logger.info(f"Cache fresco para {url[:60]}")
+            return payload
+    else:
+        etag = last_modified = body_hash = None
+
+    def _touch_cache() -> Dict[str, Any]:
+        # 304/corpo idêntico: renova o timestamp e reaproveita o payload
+        _url_cache[url] = (time.time(), etag, last_modified, body_hash, cached[4])
+        return cached[4]
+
+    def _store_cache(result: tuple[Dict[str, Any], str | None, str | None, int]) -> Dict[str, Any]:
+        payload, new_etag, new_last_modified, new_body_hash = result
+        _url_cache[url] = (time.time(), new_etag, new_last_modified, new_body_hash, payload)
+        return payload
+
+    proxy_methods = [
+        (name, target) for name, target in _build_proxy_methods(url)
+        if _proxy_available(name, now) and _take_proxy_token(name, now)
+    ]
+
+    # Corrida: os primeiros proxies disputam; o primeiro JSON válido ganha
+    racers = proxy_methods[:3]
+    fallbacks = proxy_methods[3:] + [("Direct", url)]
+
+    if racers:
+        names: Dict[asyncio.Task, str] = {}
+        for name, target in racers:
+            task = asyncio.create_task(_try_proxy(client, name, target, etag, last_modified, body_hash))
+            names[task] = name
+        tasks = set(names)
         try:
-            user_agent = random.choice(USER_AGENTS)
-            headers = {
-                "User-Agent": user_agent,
-                "Accept": "application/json, text/html, */*",
-                "Accept-Language": "en-US,en;q=0.9",
-                "DNT": "1",
-                "Connection": "keep-alive",
-            }
-            
-            logger.info(f"Tentando {proxy_name} para {url[:60]}...")
-            
-            response = await client.get(
-                target_url,
-                headers=headers,
-                timeout=25,
-                follow_redirects=True
-            )
-            response.raise_for_status()
-            
-            # Processar resposta
-            content = response.content
-            
-            # Descomprimir gzip se necessário
-            if content and content[:2] == b'\x1f\x8b':
-                try:
-                    text = gzip.decompress(content).decode('utf-8')
-                except Exception:
-                    text = response.text
-            else:
-                text = response.text
-            
-            if not text or not text.strip():
-                logger.warning(f"{proxy_name} retornou vazio")
-                continue
-            
-            # Parse JSON
-            try:
-                payload = json.loads(text)
-            except json.JSONDecodeError:
-                logger.warning(f"{proxy_name} JSON inválido")
-                continue
-            
-            # Validar estrutura
-            if isinstance(payload, list) and payload:
-                logger.info(f"✓ {proxy_name} funcionou!")
-                return payload[1] if len(payload) > 1 else payload[0]
-            elif isinstance(payload, dict):
-                logger.info(f"✓ {proxy_name} funcionou!")
-                return payload
-            else:
-                logger.warning(f"{proxy_name} estrutura inesperada")
+            pending = tasks
+            deadline = asyncio.get_running_loop().time() + 25
+            while pending:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    proxy_name = names[task]
+                    try:
+                        result = task.result()
+                    except _NotModified:
+                        if cached is None:
+                            # 304 do cache do próprio proxy: não temos payload
+                            # para reaproveitar, tratar como falha
+                            logger.warning(f"{proxy_name} devolveu 304 sem cache local")
+                            _register_proxy_failure(proxy_name)
+                            continue
+                        _register_proxy_success(proxy_name)
+                        _recover_proxy(proxy_name)
+                        return _touch_cache()
+                    except httpx.HTTPStatusError as exc:
+                        status = exc.response.status_code
+                        logger.warning(f"{proxy_name} falhou com status {status}")
+                        _register_proxy_failure(proxy_name)
+                        if status == 429 or status >= 500:
+                            _throttle_proxy(proxy_name)
+                        continue
+                    except Exception as exc:
+                        logger.warning(f"{proxy_name} erro: {type(exc).__name__}")
+                        _register_proxy_failure(proxy_name)
+                        continue
+                    _register_proxy_success(proxy_name)
+                    _recover_proxy(proxy_name)
+                    return _store_cache(result)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            # Consumir cancelamentos e exceções dos perdedores da corrida,
+            # senão o asyncio loga "Task exception was never retrieved"
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Fallback serial para os proxies restantes + fetch direto
+    for proxy_name, target_url in fallbacks:
+        try:
+            result = await _try_proxy(client, proxy_name, target_url, etag, last_modified, body_hash)
+        except _NotModified:
+            if cached is None:
+                logger.warning(f"{proxy_name} devolveu 304 sem cache local")
+                _register_proxy_failure(proxy_name)
                 continue
-                
-        except httpx.HTTPStatusError as e:
-            status = e.response.status_code
+            _register_proxy_success(proxy_name)
+            _recover_proxy(proxy_name)
+            return _touch_cache()
+        except httpx.HTTPStatusError as exc:
+            status = exc.response.status_code
             logger.warning(f"{proxy_name} falhou com status {status}")
-            last_error = e
-            if status == 429:
-                await asyncio.sleep(2)
+            _register_proxy_failure(proxy_name)
+            if status == 429 or status >= 500:
+                _throttle_proxy(proxy_name)
             continue
-            
-        except Exception as e:
-            logger.warning(f"{proxy_name} erro: {type(e).__name__}")
-            last_error = e
+        except Exception as exc:
+            logger.warning(f"{proxy_name} erro: {type(exc).__name__}")
+            _register_proxy_failure(proxy_name)
             continue
-    
+        _register_proxy_success(proxy_name)
+        _recover_proxy(proxy_name)
+        return _store_cache(result)
+
     # Todos falharam
     logger.error(f"Todos proxies falharam para {url[:60]}")
     raise HTTPException(status_code=502, detail="Todos proxies falharam")
 
 
 def iter_comments(children: Iterable[Dict[str, Any]]) -> Iterable[Dict[str, Any]]:
-    for child in children:
+    """Percorre a árvore de comentários com pilha explícita (sem recursão)
+
+    Mantém a mesma ordem de profundidade da versão recursiva original:
+    cada resposta sai logo depois do comentário pai.
+    """
+    stack = [iter(children)]
+    while stack:
+        try:
+            child = next(stack[-1])
+        except StopIteration:
+            stack.pop()
+            continue
         data = child.get("data") or {}
         yield data
         replies = data.get("replies")
         if isinstance(replies, dict):
-            yield from iter_comments(replies.get("data", {}).get("children", []))
+            sub = replies.get("data", {}).get("children")
+            if sub:
+                stack.append(iter(sub))
+
+
+def extract_codes_from_body(
+    body: str,
+    _findall=CODE_PATTERN.findall,
+    _is_valid=is_valid_candidate,
+) -> List[str]:
+    # _findall/_is_valid vêm como default args: LOAD_FAST em vez de
+    # LOAD_GLOBAL + atributo em cada corpo escaneado
+    matches: list[str] = []
+    append = matches.append
+    # Uppercase só os candidatos de 6 chars, não o corpo inteiro
+    for candidate in _findall(body):
+        candidate = candidate.upper()
+        if _is_valid(candidate):
+            append(candidate)
+    return matches
+
+
+def _process_payload(payload: Dict[str, Any], now: float) -> List[Dict[str, Any]]:
+    """Extrai candidatos de um payload já baixado (CPU-bound, roda em thread)
 
+    Não toca no Bloom nem no set de dedupe: essas estruturas não são
+    thread-safe e várias fontes processam em paralelo. O dedupe e a
+    inserção acontecem depois, na thread do event loop, via
+    _dedupe_candidates.
+    """
+    candidates: list[Dict[str, Any]] = []
+    listing = payload.get("data", {}).get("children", [])
 
-def extract_codes_from_body(body: str) -> List[str]:
-    matches = []
-    for candidate in CODE_PATTERN.findall(body.upper()):
-        if not is_valid_candidate(candidate):
+    # Resolver nomes quentes para locals antes do loop
+    already_seen = _body_already_seen
+    append = candidates.append
+
+    # Recolhe os corpos ainda não vistos para varrer todos de uma vez
+    comments: list[Dict[str, Any]] = []
+    bodies: list[str] = []
+    for comment in iter_comments(listing):
+        body = comment.get("body")
+        if not body:
+            continue
+
+        if already_seen(body):
             continue
-        matches.append(candidate)
-    return matches
 
+        comments.append(comment)
+        bodies.append(body)
+
+    if not bodies:
+        return candidates
+
+    # Uma única chamada ao engine sobre todos os corpos concatenados com um
+    # separador que nunca faz parte de um candidato; bisect sobre os offsets
+    # devolve o comentário dono de cada match
+    offsets = [0] * len(bodies)
+    pos = 0
+    for i, body in enumerate(bodies):
+        offsets[i] = pos
+        pos += len(body) + 1
+    blob = "\x00".join(bodies)
+
+    for match in CODE_PATTERN.finditer(blob):
+        code = match.group().upper()
+        if not is_valid_candidate(code):
+            continue
+
+        comment = comments[bisect_right(offsets, match.start()) - 1]
+        created_utc = float(comment.get("created_utc") or now)
+        permalink = comment.get("permalink")
+        if permalink and permalink.startswith("/"):
+            permalink = f"https://www.reddit.com{permalink}"
+
+        append({
+            "code": code,
+            "comment_id": comment.get("id", ""),
+            "author": comment.get("author"),
+            "permalink": permalink or "",
+            "created_utc": created_utc,
+            "first_seen": now,
+        })
+
+    return candidates
+
+
+def _dedupe_candidates(candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filtra candidatos já conhecidos e registra os novos
+
+    Só pode rodar na thread do event loop: é quem tem a palavra final
+    sobre o Bloom e o set de códigos vistos.
+    """
+    fresh: list[Dict[str, Any]] = []
+    for entry in candidates:
+        code = entry["code"]
+        if _bloom_maybe_contains(code) and code in _code_seen:
+            continue
+        _bloom_add(code)
+        _code_seen.add(code)
+        fresh.append(entry)
+    return fresh
 
-async def scan_reddit_source(client: httpx.AsyncClient, url: str, now: float) -> List[CodeEntry]:
+
+async def scan_reddit_source(client: httpx.AsyncClient, url: str, now: float) -> List[Dict[str, Any]]:
     """Escaneia uma fonte do Reddit"""
-    new_codes: list[CodeEntry] = []
-    
+    new_codes: list[Dict[str, Any]] = []
+
     try:
         payload = await fetch_thread_json(client, url)
-        listing = payload.get("data", {}).get("children", [])
-        
-        for comment in iter_comments(listing):
-            body = comment.get("body")
-            if not body:
-                continue
-            
-            codes = extract_codes_from_body(body)
-            if not codes:
-                continue
-            
-            created_utc = float(comment.get("created_utc") or now)
-            permalink = comment.get("permalink")
-            if permalink and permalink.startswith("/"):
-                permalink = f"https://www.reddit.com{permalink}"
-            
-            for code in codes:
-                if code in _codes:
-                    continue
-                    
-                entry = CodeEntry(
-                    code=code,
-                    comment_id=comment.get("id", ""),
-                    author=comment.get("author"),
-                    permalink=permalink or "",
-                    created_utc=created_utc,
-                    first_seen=now,
-                )
-                _codes[code] = entry
-                new_codes.append(entry)
-                
+        # Parse+regex em thread para não travar o event loop; o dedupe
+        # fica aqui, na thread do loop
+        candidates = await asyncio.to_thread(_process_payload, payload, now)
+        new_codes = _dedupe_candidates(candidates)
+
         if new_codes:
             logger.info(f"✓ {len(new_codes)} códigos novos em {url[:60]}")
-            
+
     except Exception as exc:
         logger.warning(f"Falha ao escanear {url[:60]}: {exc}")
-    
+
     return new_codes
 
 
-async def scan_twitter_source(client: httpx.AsyncClient, url: str, now: float) -> List[CodeEntry]:
+async def scan_twitter_source(client: httpx.AsyncClient, url: str, now: float) -> List[Dict[str, Any]]:
     """Escaneia Twitter/X (requer ScraperAPI)"""
-    new_codes: list[CodeEntry] = []
+    new_codes: list[Dict[str, Any]] = []
     
     if not SCRAPE_DO_TOKEN:
         return new_codes
     
     try:
         target_url = f"http://api.scraperapi.com?api_key={SCRAPE_DO_TOKEN}&url={quote_plus(url)}"
-        response = await client.get(target_url, timeout=20, verify=False)
+        response = await client.get(target_url, timeout=20)
         response.raise_for_status()
-        
-        text = response.text
-        codes = extract_codes_from_body(text)
-        
-        for code in codes:
-            if code in _codes:
-                continue
-                
-            entry = CodeEntry(
-                code=code,
-                comment_id="",
-                author="twitter",
-                permalink=url,
-                created_utc=now,
-                first_seen=now,
-            )
-            _codes[code] = entry
-            new_codes.append(entry)
+
+        # Regex em bytes direto no HTML cru: pula o decode da página inteira
+        candidates = [
+            {
+                "code": code,
+                "comment_id": "",
+                "author": "twitter",
+                "permalink": url,
+                "created_utc": now,
+                "first_seen": now,
+            }
+            for code in (raw.upper().decode("ascii") for raw in CODE_PATTERN_B.findall(response.content))
+            if is_valid_candidate(code)
+        ]
+        new_codes = _dedupe_candidates(candidates)
             
     except Exception as exc:
         logger.warning(f"Falha Twitter {url}: {exc}")
@@ -295,74 +653,73 @@ async def scan_twitter_source(client: httpx.AsyncClient, url: str, now: float) -
     return new_codes
 
 
-async def scan_once() -> List[CodeEntry]:
-    global _last_fetch
-    
-    new_codes: list[CodeEntry] = []
-    now = time.time()
-    
-    headers = {
-        "User-Agent": random.choice(USER_AGENTS),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "DNT": "1",
-        "Connection": "keep-alive",
-    }
-    
-    # Cliente HTTP com SSL desabilitado
-    async with httpx.AsyncClient(
-        timeout=25,
-        headers=headers,
+async def _bounded(coro: Any) -> List[Dict[str, Any]]:
+    """Executa a corrotina respeitando o limite de concorrência"""
+    async with _scan_semaphore:
+        return await coro
+
+
+def _build_client() -> httpx.AsyncClient:
+    """Cria o cliente HTTP compartilhado com pool de conexões persistente"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(25.0, connect=5.0),
+        headers=BASE_HEADERS,
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=60,
+        ),
+        http2=True,
         follow_redirects=True,
-        verify=False  # Desabilita verificação SSL
-    ) as client:
-        # Escanear Reddit
-        for thread_url in THREAD_URLS:
-            thread_url = thread_url.strip()
-            if not thread_url:
-                continue
-                
-            logger.info(f"Escaneando: {thread_url[:60]}...")
-            codes = await scan_reddit_source(client, thread_url, now)
-            new_codes.extend(codes)
-            await asyncio.sleep(1)
-        
-        # Escanear Twitter
-        for twitter_url in TWITTER_SEARCH_URLS:
-            twitter_url = twitter_url.strip()
-            if not twitter_url:
-                continue
-                
-            codes = await scan_twitter_source(client, twitter_url, now)
-            new_codes.extend(codes)
+        verify=False,  # Desabilita verificação SSL
+    )
+
+
+async def scan_once() -> List[Dict[str, Any]]:
+    global _last_fetch, _codes_snapshot
+
+    new_codes: list[Dict[str, Any]] = []
+    now = time.time()
+
+    client: httpx.AsyncClient = app.state.client
+
+    # Disparar todas as fontes em paralelo (limitado pelo semáforo)
+    tasks = [
+        _bounded(scan_reddit_source(client, thread_url.strip(), now))
+        for thread_url in THREAD_URLS
+        if thread_url.strip()
+    ]
+    tasks += [
+        _bounded(scan_twitter_source(client, twitter_url.strip(), now))
+        for twitter_url in TWITTER_SEARCH_URLS
+        if twitter_url.strip()
+    ]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning(f"Fonte falhou: {type(result).__name__}: {result}")
+            continue
+        new_codes.extend(result)
     
-    # Atualizar lista
+    # Atualizar lista: todos os novos têm first_seen=now, então inserir na
+    # cabeça preserva a ordenação sem re-sort O(N log N)
     if new_codes:
-        _ordered_codes.extend(new_codes)
-        _ordered_codes.sort(key=lambda item: item.first_seen, reverse=True)
-        
-        if len(_ordered_codes) > MAX_CODES:
-            for entry in _ordered_codes[MAX_CODES:]:
-                _codes.pop(entry.code, None)
-            del _ordered_codes[MAX_CODES:]
+        # Ordena só o lote novo (dezenas no máximo) pela data do comentário;
+        # extendleft(reversed(...)) preserva essa ordem na cabeça do deque
+        new_codes.sort(key=lambda entry: entry["created_utc"], reverse=True)
+        _ordered_codes.extendleft(reversed(new_codes))
+        while len(_ordered_codes) > MAX_CODES:
+            dropped = _ordered_codes.pop()
+            _code_seen.discard(dropped["code"])
     
+    _codes_snapshot = tuple(_ordered_codes)
     _last_fetch = time.time()
     logger.info(f"✓ Scan completo: {len(new_codes)} novos de {len(THREAD_URLS)} fontes")
     
     return new_codes
 
 
-def _prune_invalid_entries() -> None:
-    if not _ordered_codes:
-        return
-    invalid_codes = {entry.code for entry in _ordered_codes if not is_valid_candidate(entry.code)}
-    if not invalid_codes:
-        return
-    _ordered_codes[:] = [entry for entry in _ordered_codes if entry.code not in invalid_codes]
-    for code in invalid_codes:
-        _codes.pop(code, None)
-
-
 async def scanner_loop() -> None:
     """Loop principal do scanner"""
     logger.info("🚀 Scanner iniciado!")
@@ -384,6 +741,7 @@ async def scanner_loop() -> None:
 @app.on_event("startup")
 async def startup_event() -> None:
     global _scanner_task
+    app.state.client = _build_client()
     if _scanner_task is None:
         _scanner_task = asyncio.create_task(scanner_loop())
 
@@ -396,21 +754,32 @@ async def shutdown_event() -> None:
         with contextlib.suppress(asyncio.CancelledError):
             await _scanner_task
         _scanner_task = None
+    client = getattr(app.state, "client", None)
+    if client is not None:
+        await client.aclose()
+        app.state.client = None
 
 
-@app.get("/api/codes", response_model=CodesResponse)
-async def get_codes() -> CodesResponse:
-    async with _results_lock:
-        _prune_invalid_entries()
-        return CodesResponse(codes=list(_ordered_codes), fetched_at=_last_fetch)
+@app.get("/api/codes")
+async def get_codes() -> ORJSONResponse:
+    # Leitura sem lock: o snapshot é trocado atomicamente pelo scanner;
+    # as entradas já são dicts, então a serialização vai direto pro orjson
+    return ORJSONResponse({"codes": list(_codes_snapshot), "fetched_at": _last_fetch})
 
 
-@app.post("/api/scan", response_model=CodesResponse)
-async def manual_scan() -> CodesResponse:
-    async with _results_lock:
-        await scan_once()
-        _prune_invalid_entries()
-        return CodesResponse(codes=list(_ordered_codes), fetched_at=_last_fetch)
+@app.post("/api/scan")
+async def manual_scan() -> ORJSONResponse:
+    global _manual_scans_pending
+    if _manual_scans_pending > SCAN_QUEUE_LIMIT:
+        raise HTTPException(status_code=503, detail="Fila de scans cheia")
+    _manual_scans_pending += 1
+    try:
+        async with _manual_scan_gate:
+            async with _results_lock:
+                await scan_once()
+            return ORJSONResponse({"codes": list(_codes_snapshot), "fetched_at": _last_fetch})
+    finally:
+        _manual_scans_pending -= 1
 
 
 @app.get("/api/health")
@@ -4,9 +4,12 @@ Test suite for scanner backend functionality.
 Tests code extraction, validation, and comment processing.
 """
 
+import re
 import sys
 from pathlib import Path
 
+import pytest
+
 # Setup path to allow imports from parent directory
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -85,3 +88,92 @@ class TestCommentProcessing:
 
         assert comment_ids == {"1", "1.1"}, \
             "Both root and nested comments should be extracted"
+
+
+class TestCodePattern:
+    """Tests for the compiled code pattern."""
+
+    def test_rejects_all_alpha_and_all_digit_tokens(self):
+        """The stdlib pattern itself rejects tokens without mixed content."""
+        if backend_app._regex_engine is not re:
+            pytest.skip("lookahead constraints only apply to the stdlib engine")
+
+        text = "noise ABCDEF 123456 AB1CDE then real AB12CD here"
+        matches = backend_app.CODE_PATTERN.findall(text)
+
+        assert matches == ["AB12CD"], \
+            "Only tokens with at least two letters and two digits should match"
+
+
+class TestPayloadProcessing:
+    """Tests for full-payload candidate extraction."""
+
+    def test_attributes_codes_to_their_comments(self):
+        """Codes found in the concatenated scan map back to the right comment."""
+        payload = {
+            "data": {
+                "children": [
+                    {
+                        "data": {
+                            "id": "c1",
+                            "author": "alpha",
+                            "permalink": "/r/test/c1",
+                            "created_utc": 100,
+                            "body": "XY12AB right at the start of this body",
+                        }
+                    },
+                    {
+                        "data": {
+                            "id": "c2",
+                            "author": "beta",
+                            "created_utc": 200,
+                            "body": "PQ34CD also opens the second body",
+                            "replies": {
+                                "data": {
+                                    "children": [
+                                        {
+                                            "data": {
+                                                "id": "c3",
+                                                "created_utc": 300,
+                                                "body": "nested reply hiding GH56EF inside",
+                                            }
+                                        }
+                                    ]
+                                }
+                            },
+                        }
+                    },
+                ]
+            }
+        }
+
+        candidates = backend_app._process_payload(payload, now=1000.0)
+        by_code = {entry["code"]: entry["comment_id"] for entry in candidates}
+
+        assert by_code == {"XY12AB": "c1", "PQ34CD": "c2", "GH56EF": "c3"}, \
+            "Each code should be attributed to the comment that contains it"
+
+
+class TestDeduplication:
+    """Tests for Bloom-backed code deduplication."""
+
+    def test_set_is_authoritative_after_eviction(self):
+        """A code evicted from the set is accepted again despite Bloom bits."""
+        entry = {
+            "code": "ZK49XW",
+            "comment_id": "d1",
+            "author": "gamma",
+            "permalink": "",
+            "created_utc": 1.0,
+            "first_seen": 1.0,
+        }
+
+        assert backend_app._dedupe_candidates([dict(entry)]), \
+            "Unknown code should be accepted"
+        assert backend_app._dedupe_candidates([dict(entry)]) == [], \
+            "Known code should be dropped"
+
+        # Eviction remove o código do set mas deixa os bits no Bloom
+        backend_app._code_seen.discard("ZK49XW")
+        assert backend_app._dedupe_candidates([dict(entry)]), \
+            "Bloom positive with a set miss should be treated as new"